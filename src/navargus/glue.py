@@ -22,16 +22,21 @@ Exports events from NAV's Event Engine streaming interface into an Argus server.
 JSON parsing inspired by https://stackoverflow.com/a/58442063
 """
 
-import select
+import codecs
+import selectors
 import sys
 import os
-import re
+import queue
+import threading
 import logging
 import argparse
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from json import JSONDecoder, JSONDecodeError
-from typing import Generator, Tuple, List
+from typing import Dict, FrozenSet, Optional, Tuple, List
 
 import yaml
 
@@ -44,22 +49,39 @@ from nav.models.fields import INFINITY
 bootstrap_django("navargus")
 
 from nav.models.manage import Netbox, Interface
-from nav.models.service import Service
-from nav.models.event import AlertHistory, STATE_START, STATE_STATELESS, STATE_END
+from nav.models.event import AlertHistory, AlertHistoryMessage
+from nav.models.event import STATE_START, STATE_STATELESS, STATE_END
 from nav.logs import init_stderr_logging
 from nav.config import open_configfile
 from nav.buildconf import VERSION as _NAV_VERSION
 
+from django.db.models import Exists, OuterRef, Prefetch, Q, QuerySet
 from django.urls import reverse
 
 
 _logger = logging.getLogger("navargus")
 _client = None
 _config: "Configuration" = None
-NOT_WHITESPACE = re.compile(r"[^\s]")
+_recent_posts: "OrderedDict[int, float]" = OrderedDict()
+_recent_posts_lock = threading.Lock()
+JSON_DECODER = JSONDecoder()
+JSON_WHITESPACE = frozenset(" \t\n\r")
 NAV_SERIES = tuple(int(i) for i in _NAV_VERSION.split(".")[:2])
 NAV_VERSION_WITH_SEVERITY = (5, 2)
+NAV_HAS_SEVERITY = NAV_SERIES >= NAV_VERSION_WITH_SEVERITY
 SELECT_TIMEOUT = 30.0  # seconds
+READ_BUFFER_SIZE = 65536  # bytes, the default capacity of a Linux pipe
+COMPACT_THRESHOLD = 65536  # characters of consumed stream buffer
+NETBOX_CACHE_TTL = 60  # seconds
+DISPATCH_WORKERS = 4
+DISPATCH_QUEUE_SIZE = 64  # alerts per worker
+SYNC_WORKERS = 8
+SYNC_CHUNK_SIZE = 2000  # rows fetched per database round-trip
+EVENT_DETAILS_PLACEHOLDER_ID = 987654321
+RECENT_POSTS_TTL = 60  # seconds
+ALERTHIST_RETRY_DELAYS = (0.05, 0.1, 0.2, 0.65)  # seconds, 1 second in total
+# Event types whose alerts refer to a service by their subid
+SERVICE_EVENT_TYPES = ("serviceState", "maintenanceState")
 
 
 def main():
@@ -111,8 +133,6 @@ def read_eventengine_stream():
     """Reads a continuous stream of eventengine JSON blobs on stdin and updates the
     connected Argus server based on this.
     """
-    # Ensure we do non-blocking reads from stdin, as we don't wont to get stuck when
-    # we receive blobs that are smaller than the set buffer size
     from navargus import __version__ as version
 
     _logger.info(
@@ -120,74 +140,174 @@ def read_eventengine_stream():
         os.getpid(),
         version,
     )
-    os.set_blocking(sys.stdin.fileno(), False)
 
+    # Set up the shared API client before any dispatcher threads need it
+    get_argus_client()
+    dispatcher = AlertDispatcher()
     try:
-        for alert in emit_json_objects_from(sys.stdin):
+        for alert in emit_json_objects_from(sys.stdin, stop_fd=dispatcher.failed_fd):
             _logger.debug("got alert to dispatch: %r", alert.get("message"))
-            dispatch_alert_to_argus(alert)
+            dispatcher.submit(alert)
     except KeyboardInterrupt:
         _logger.info("Keyboard interrupt received, exiting")
-        pass
-
-
-def emit_json_objects_from(stream, buf_size=1024, decoder=JSONDecoder()):
+    finally:
+        # Alerts already read from the stream are still dispatched, and a dispatch
+        # error is re-raised here, making navargus exit with it
+        dispatcher.close()
+
+
+def emit_json_objects_from(
+    stream,
+    buf_size=READ_BUFFER_SIZE,
+    decoder=JSON_DECODER,
+    stop_fd: Optional[int] = None,
+):
     """Generates a sequence of objects based on a stream of stacked JSON blobs.
 
+    Data is read as raw bytes directly from the stream's file descriptor and decoded
+    incrementally, so that each block is only decoded once. Decoded objects are
+    consumed by advancing a read position into the buffer, which is only compacted
+    once the consumed prefix grows larger than COMPACT_THRESHOLD. An incomplete
+    object is only parsed again once a block arrives that could possibly complete it.
+
     BUGS: If the stream ever emits anything that is not valid JSON in between the
     emitted whitespace, this entire code breaks down, since it always tries to decode
-    the whole concatenated buffer for every block received.
+    the unconsumed part of the buffer for every new block received.
 
-    :param stream: Any file-like object.
+    :param stream: Any file-like object backed by a file descriptor.
     :param buf_size: The buffer size to use when reading from the stream.
     :param decoder: The decoder object to use for decoding data read from the stream.
     :type decoder: JSONDecoder
+    :param stop_fd: An optional file descriptor that makes the generator stop
+                    reading from the stream once it becomes readable.
     """
+    fd = stream.fileno()
+    # Unlike epoll, select() also accepts regular files and /dev/null as input
+    selector = selectors.SelectSelector()
+    selector.register(fd, selectors.EVENT_READ)
+    if stop_fd is not None:
+        selector.register(stop_fd, selectors.EVENT_READ)
+    utf8 = codecs.getincrementaldecoder("utf-8")()
     buffer = ""
-    last_block_size = 0
+    pos = 0
     error = None
-    while True:
-        if last_block_size < buf_size:
-            readable, _, _ = select.select([stream], [], [], SELECT_TIMEOUT)
-        if last_block_size >= buf_size or stream in readable:
+    try:
+        while True:
+            ready = selector.select(SELECT_TIMEOUT)
+            if not ready:
+                _logger.debug("select timed out")
+                continue
+            if any(key.fd == stop_fd for key, _ in ready):
+                _logger.info("asked to stop reading the input stream, exiting")
+                return
             _logger.debug("reading data from %r", stream)
-            block = stream.read(buf_size)
+            # A single read() won't block once select() has reported the input as
+            # readable. An empty result therefore means the input has actually gone
+            # away.
+            block = os.read(fd, buf_size)
             if not block:
-                if not last_block_size:
-                    # select() will keep claiming that the input handle has data
-                    # available when the input pipe is actually gone. If we read two
-                    # empty blocks in a row, we take it as a sign that our input is
-                    # gone, and we should exit.
-                    _logger.info(
-                        "read multiple empty blocks in a row, maybe input went away. "
-                        "aborting..."
-                    )
-                    return
-                last_block_size = 0
+                _logger.info("end of input stream reached, exiting")
+                return
+
+            text = utf8.decode(block)
+            buffer += text
+            if error and buffer[pos] in "{[" and "}" not in text and "]" not in text:
+                # An incomplete object or array can only be completed by a block
+                # containing its closing bracket, so don't bother parsing it again
                 continue
-            last_block_size = len(block)
-        else:
-            _logger.debug("select timed out")
-            continue
+            length = len(buffer)
+            while True:
+                while pos < length and buffer[pos] in JSON_WHITESPACE:
+                    pos += 1
+                if pos >= length:
+                    break
+                try:
+                    obj, pos = decoder.raw_decode(buffer, pos)
+                except JSONDecodeError as err:
+                    error = err
+                    break
+                else:
+                    error = None
+                    yield obj
+            if pos >= len(buffer) or pos > COMPACT_THRESHOLD:
+                buffer = buffer[pos:]
+                pos = 0
+    finally:
+        selector.close()
+
+
+class AlertDispatcher:
+    """Dispatches alerts to Argus from a pool of background threads.
+
+    This keeps navargus reading the eventengine stream while it waits for the NAV
+    database or the Argus API, so that eventengine isn't blocked from writing new
+    alerts. Argus has no bulk API for posting or resolving incidents, so each alert
+    is still dispatched by itself.
+
+    Alerts are routed to worker threads by their alert history ID. This lets
+    unrelated alerts be dispatched in parallel, while every state change of a single
+    alert is dispatched in the order it was received. Each worker has a bounded
+    queue, so that a flood of alerts will eventually block the submitter rather than
+    exhaust memory.
+
+    The failed_fd file descriptor becomes readable as soon as an alert fails to
+    dispatch, so that the submitter can wait for it along with its own input and
+    stop reading new alerts.
+    """
 
-        buffer += block
-        pos = 0
+    def __init__(
+        self, workers: int = DISPATCH_WORKERS, queue_size: int = DISPATCH_QUEUE_SIZE
+    ):
+        self.error = None
+        self.failed_fd, self._failed_notify_fd = os.pipe()
+        self._error_lock = threading.Lock()
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._threads = [
+            threading.Thread(
+                target=self._run,
+                args=(alerts,),
+                name="dispatcher-{}".format(index),
+                daemon=True,
+            )
+            for index, alerts in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, alert: dict):
+        """Queues an alert structure for dispatching to Argus."""
+        worker = hash(alert.get("history")) % len(self._queues)
+        self._queues[worker].put(alert)
+
+    def close(self):
+        """Waits for all queued alerts to be dispatched and stops the background
+        threads.
+
+        :raises Exception: The first error that occurred while dispatching an
+                           alert, if any.
+        """
+        for alerts in self._queues:
+            alerts.put(None)
+        for thread in self._threads:
+            thread.join()
+        os.close(self.failed_fd)
+        os.close(self._failed_notify_fd)
+        if self.error:
+            raise self.error
+
+    def _run(self, alerts: queue.Queue):
         while True:
-            match = NOT_WHITESPACE.search(buffer, pos)
-            if not match:
-                break
-            pos = match.start()
+            alert = alerts.get()
+            if alert is None:
+                return
             try:
-                obj, pos = decoder.raw_decode(buffer, pos)
-            except JSONDecodeError as err:
-                error = err
-                break
-            else:
-                error = None
-                yield obj
-        buffer = buffer[pos:]
-    if error is not None:
-        raise error
+                dispatch_alert_to_argus(alert)
+            except Exception as error:  # re-raised by the main thread
+                _logger.exception("Failed to dispatch alert: %r", alert.get("message"))
+                with self._error_lock:
+                    if not self.error:
+                        self.error = error
+                        os.write(self._failed_notify_fd, b"\0")
 
 
 def dispatch_alert_to_argus(alert: dict):
@@ -196,50 +316,116 @@ def dispatch_alert_to_argus(alert: dict):
     :param alert: A deserialized JSON blob received from event engine
     """
     alerthistid = alert.get("history")
-    on_maintenance = (
-        bool(alert.get("on_maintenance"))
-        or alert.get("event_type", {}).get("id") == "maintenanceState"
-    )
     if not alerthistid:
         return
+    state = alert.get("state")
+    message = alert.get("message")
+    event_type = (alert.get("event_type") or {}).get("id")
+    on_maintenance = (
+        bool(alert.get("on_maintenance")) or event_type == "maintenanceState"
+    )
 
+    event_types = _config.get_event_types()
+    if event_types and event_type not in event_types:
+        _logger.debug("Ignoring alert of an unwanted event type: %s", message)
+        return
     if _config.get_ignore_maintenance() and on_maintenance:
         _logger.info(
-            "Not posting incident as alert subject is on maintenance: %s",
-            alert.get("message"),
+            "Not posting incident as alert subject is on maintenance: %s", message
         )
         return
+    if state == STATE_STATELESS and _config.get_ignore_stateless():
+        _logger.info("Ignoring stateless alert as configured to: %s", message)
+        return
+    if state in (STATE_START, STATE_STATELESS) and mark_as_posted(alerthistid):
+        _logger.info("Ignoring alert already posted to Argus: %s", message)
+        return
     # We don't care about most of the contents of the JSON blob we received,
     # actually, since we can fetch what we want and more directly from the NAV
     # database
-    try:
-        alerthist = AlertHistory.objects.get(pk=alerthistid)
-    except AlertHistory.DoesNotExist:
-        # Workaround for eventengine bug: Its transaction is potentially not
-        # committed yet, so we wait just a little bit:
-        time.sleep(1)
-        try:
-            alerthist = AlertHistory.objects.get(pk=alerthistid)
-        except AlertHistory.DoesNotExist:
-            _logger.error(
-                "Ignoring invalid alerthist PK received from event engine: %r",
-                alerthistid,
-            )
-            return
-
-    state = alert.get("state")
     if state in (STATE_START, STATE_STATELESS):
-        if state == STATE_STATELESS and _config.get_ignore_stateless():
-            _logger.info(
-                "Ignoring stateless alert as configured to: %s", alert.get("message")
-            )
+        alerthist = get_alerthistory(alerthistid)
+        if not alerthist:
+            # nothing was posted, so a later export of this alert must not be ignored
+            forget_posted(alerthistid)
             return
-        incident = convert_alerthistory_object_to_argus_incident(alerthist)
-        post_incident_to_argus(incident)
+        try:
+            incident = convert_alerthistory_object_to_argus_incident(alerthist)
+            post_incident_to_argus(incident)
+        except Exception:
+            forget_posted(alerthistid)
+            raise
     else:
         # when resolving, the AlertHistory timestamp may not have been updated yet
         timestamp = alert.get("time")
-        resolve_argus_incident(alerthist, timestamp)
+        forget_posted(alerthistid)
+        resolve_argus_incident(alerthistid, timestamp)
+
+
+def get_alerthistory(alerthistid: int) -> Optional[AlertHistory]:
+    """Fetches an AlertHistory object, along with the details needed to describe it
+    as an Argus incident.
+
+    :returns: The AlertHistory object, or None if it doesn't exist.
+    """
+    alerts = prefetch_incident_details(AlertHistory.objects)
+    for delay in ALERTHIST_RETRY_DELAYS:
+        try:
+            return alerts.get(pk=alerthistid)
+        except AlertHistory.DoesNotExist:
+            # Workaround for eventengine bug: Its transaction is potentially not
+            # committed yet, so we wait a little bit, a bit longer for every retry:
+            time.sleep(delay)
+    try:
+        return alerts.get(pk=alerthistid)
+    except AlertHistory.DoesNotExist:
+        _logger.error(
+            "Ignoring invalid alerthist PK received from event engine: %r",
+            alerthistid,
+        )
+        return None
+
+
+def mark_as_posted(alerthistid: int) -> bool:
+    """Marks an alert as posted to Argus.
+
+    Eventengine may export the same alert more than once, e.g. for noisy devices.
+    Alerts are remembered for RECENT_POSTS_TTL seconds, so that repeated exports
+    within that time can be ignored without doing any database or API work.
+
+    :returns: True if the alert had already been marked within the last
+              RECENT_POSTS_TTL seconds.
+    """
+    now = time.monotonic()
+    with _recent_posts_lock:
+        # entries are never re-inserted, so they are ordered by posting time
+        while _recent_posts:
+            oldest = next(iter(_recent_posts))
+            if now - _recent_posts[oldest] < RECENT_POSTS_TTL:
+                break
+            _recent_posts.popitem(last=False)
+        if alerthistid in _recent_posts:
+            return True
+        _recent_posts[alerthistid] = now
+        return False
+
+
+def forget_posted(alerthistid: int):
+    """Removes an alert's posted mark, e.g. because it is being resolved"""
+    with _recent_posts_lock:
+        _recent_posts.pop(alerthistid, None)
+
+
+def prefetch_incident_details(queryset: QuerySet) -> QuerySet:
+    """Makes an AlertHistory queryset fetch the related objects needed to describe
+    its alerts as Argus incidents in as few database queries as possible.
+    """
+    return queryset.select_related("alert_type", "netbox").prefetch_related(
+        Prefetch(
+            "messages",
+            queryset=AlertHistoryMessage.objects.filter(type="sms", language="en"),
+        )
+    )
 
 
 def convert_alerthistory_object_to_argus_incident(alert: AlertHistory) -> Incident:
@@ -248,7 +434,7 @@ def convert_alerthistory_object_to_argus_incident(alert: AlertHistory) -> Incide
     :param alert: A NAV AlertHistory object
     :returns: An object describing an Argus Incident, suitable for POSTing to its API.
     """
-    url = reverse("event-details", args=(alert.pk,))
+    url = get_event_details_url_template().format(alert.pk)
 
     incident = Incident(
         start_time=alert.start_time,
@@ -257,14 +443,25 @@ def convert_alerthistory_object_to_argus_incident(alert: AlertHistory) -> Incide
         details_url=url if url else "",
         description=get_short_start_description(alert),
         level=convert_severity_to_level(alert.severity),
-        tags=dict(build_tags_from(alert)),
+        tags=build_tags_from(alert),
     )
     return incident
 
 
+@lru_cache(maxsize=None)
+def get_event_details_url_template() -> str:
+    """Returns a format string for the URL of an alert's details page in NAV.
+
+    The URL is only reversed once, using a placeholder ID, since reverse() has to
+    walk Django's URL resolver every time it is called.
+    """
+    placeholder = str(EVENT_DETAILS_PLACEHOLDER_ID)
+    return reverse("event-details", args=(placeholder,)).replace(placeholder, "{}")
+
+
 def convert_severity_to_level(severity: int) -> int:
     """Converts a NAV severity level into an Argus Incident level"""
-    if NAV_SERIES >= NAV_VERSION_WITH_SEVERITY:
+    if NAV_HAS_SEVERITY:
         return severity  # NAV severity levels match Argus levels from this version on
     else:
         return _config.get_default_level()
@@ -274,46 +471,82 @@ def get_short_start_description(alerthist: AlertHistory):
     """Describes an AlertHistory object via its shortest, english-language start
     message (or stateless message, in the case of stateless alerts)
     """
-    msgs = alerthist.messages.filter(
-        type="sms", state__in=(STATE_START, STATE_STATELESS), language="en"
-    )
-    return msgs[0].message if msgs else ""
+    return get_short_message(alerthist, (STATE_START, STATE_STATELESS))
 
 
 def get_short_end_description(alerthist: AlertHistory):
     """Describes an AlertHistory object via its shortest, english-language end
     message.
     """
-    msgs = alerthist.messages.filter(type="sms", state=STATE_END, language="en")
-    return msgs[0].message if msgs else ""
+    return get_short_message(alerthist, (STATE_END,))
+
 
+def get_short_message(alerthist: AlertHistory, states: Tuple[str, ...]) -> str:
+    """Returns the first english-language SMS message of an AlertHistory object that
+    has one of the given states, or an empty string if there is none.
 
-def build_tags_from(alert: AlertHistory) -> Generator:
+    The messages are filtered in Python rather than in the database, so that
+    messages prefetched by prefetch_incident_details() are used without any further
+    queries.
     """
-    Generates a series of tag tuples
+    for msg in alerthist.messages.all():
+        if msg.type == "sms" and msg.language == "en" and msg.state in states:
+            return msg.message
+    return ""
+
+
+def build_tags_from(alert: AlertHistory) -> Dict[str, str]:
+    """
+    Builds a tag dictionary for an Argus incident
     :param alert: An AlertHistory object from NAV
-    :returns: A generator of (tag_name, tag_value) tuples, suitable to make a tag
-              dictionary for an Argus incident.
+    :returns: A dictionary of tag names and tag values, suitable for an Argus
+              incident.
     """
-    yield "event_type", alert.event_type_id
-    if alert.alert_type:
-        yield "alert_type", alert.alert_type.name
+    tags = {"event_type": alert.event_type_id}
+    if alert.alert_type_id:
+        tags["alert_type"] = alert.alert_type.name
     subject = alert.get_subject()
     # TODO: Find a sane convention for translating various event subjects to tags, such
     #       as power supplies, modules etc.
 
-    if alert.netbox:
-        yield "host", alert.netbox.sysname
-        yield "room", alert.netbox.room.id
-        yield "location", alert.netbox.room.location.id
-        yield "organization", alert.netbox.organization.id
+    if alert.netbox_id:
+        tags.update(get_netbox_tags(alert.netbox_id))
     if isinstance(subject, Netbox):
-        yield "host_url", subject.get_absolute_url()
+        tags["host_url"] = subject.get_absolute_url()
     elif isinstance(subject, Interface):
-        yield "interface", subject.ifname
+        tags["interface"] = subject.ifname
+
+    tags.update(_config.get_always_add_tags())
+    return tags
 
-    for tag, value in _config.get_always_add_tags().items():
-        yield tag, value
+
+def get_netbox_tags(netbox_id: int) -> Tuple[Tuple[str, str], ...]:
+    """Returns the tags that describe a Netbox and its whereabouts.
+
+    The tags change very rarely, so they are cached for up to NETBOX_CACHE_TTL
+    seconds to avoid hitting the database for every alert concerning the same Netbox.
+
+    :returns: A tuple of (tag_name, tag_value) tuples.
+    """
+    return _get_netbox_tags(netbox_id, int(time.time() // NETBOX_CACHE_TTL))
+
+
+@lru_cache(maxsize=4096)
+def _get_netbox_tags(netbox_id: int, _ttl_bucket: int) -> Tuple[Tuple[str, str], ...]:
+    """Looks up the tags of a Netbox. The otherwise unused _ttl_bucket argument is
+    part of the cache key, and lets cached entries go stale when time moves on.
+    """
+    sysname, room, location, organization = (
+        Netbox.objects.filter(pk=netbox_id)
+        .values_list("sysname", "room", "room__location", "organization")
+        .get()
+    )
+    return (
+        ("host", sysname),
+        ("room", room),
+        ("location", location),
+        ("organization", organization),
+    )
 
 
 def post_incident_to_argus(incident: Incident) -> int:
@@ -324,31 +557,36 @@ def post_incident_to_argus(incident: Incident) -> int:
         return incident_response.pk
 
 
-def resolve_argus_incident(alert: AlertHistory, timestamp=None):
-    """Looks up the mirror Incident of alert in Argus and marks it as resolved.
+def resolve_argus_incident(alerthistid: int, timestamp=None):
+    """Looks up the mirror Incident of an alert in Argus and marks it as resolved.
+
+    The NAV AlertHistory object is only fetched from the database once a matching
+    Incident has been found in Argus.
 
-    :param alert: The NAV AlertHistory object used to find the Argus Incident.
+    :param alerthistid: The ID of the NAV AlertHistory object used to find the Argus
+                        Incident.
     :param timestamp: The optional timestamp of the ending event. Because of the way
                       event engine works, the AlertHistory record may actually not have
                       been updated yet at the time the ending event is exported into
                       this program.
     """
     client = get_argus_client()
-    incident = next(
-        client.get_my_incidents(open=True, source_incident_id=alert.pk), None
-    )
-    if incident:
-        if incident.end_time != INFINITY:
-            _logger.error("Cannot resolve a stateless incident")
-            return
-        _logger.debug("Resolving with an end_time of %r", timestamp or alert.end_time)
-        client.resolve_incident(
-            incident,
-            description=get_short_end_description(alert),
-            timestamp=timestamp or alert.end_time,
-        )
-    else:
+    incident = find_argus_incident(alerthistid, open=True)
+    if not incident:
         _logger.warning("Couldn't find corresponding Argus Incident to resolve")
+        return
+    if incident.end_time != INFINITY:
+        _logger.error("Cannot resolve a stateless incident")
+        return
+    alert = get_alerthistory(alerthistid)
+    if not alert:
+        return
+    _logger.debug("Resolving with an end_time of %r", timestamp or alert.end_time)
+    client.resolve_incident(
+        incident,
+        description=get_short_end_description(alert),
+        timestamp=timestamp or alert.end_time,
+    )
 
 
 def get_argus_client():
@@ -356,7 +594,9 @@ def get_argus_client():
     global _client
     if not _client:
         _client = Client(
-            api_root_url=_config.get_api_url(), token=_config.get_api_token(), timeout=_config.get_api_timeout()
+            api_root_url=_config.get_api_url(),
+            token=_config.get_api_token(),
+            timeout=_config.get_api_timeout(),
         )
     return _client
 
@@ -379,44 +619,78 @@ def do_sync():
     """
     unresolved_argus_incidents, new_nav_alerts = get_unsynced_report()
 
-    for alert in new_nav_alerts:
-        description = describe_alerthist(alert).replace("\t", " ")
-        incident = verify_incident_exists(alert.pk)
-        if incident:
-            _logger.warning(
-                "Argus incident %s already exists for this NAV alert, with end_time "
-                "set to %r, ignoring: %s",
-                incident.pk,
-                incident.end_time,
-                description,
+    # Argus requests are sent in parallel, as they are only bound by Argus response
+    # times. NAV database lookups are kept in this thread.
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as executor:
+        posts = [
+            executor.submit(
+                post_missing_incident_to_argus,
+                alert.pk,
+                convert_alerthistory_object_to_argus_incident(alert),
+                describe_alerthist(alert, sep=" "),
             )
-            continue
-        incident = convert_alerthistory_object_to_argus_incident(alert)
-        _logger.debug("Posting to Argus: %s", description)
-        post_incident_to_argus(incident)
+            for alert in new_nav_alerts
+        ]
+        for post in posts:
+            post.result()
 
     client = get_argus_client()
-    for incident in unresolved_argus_incidents:
-        try:
-            alert = AlertHistory.objects.get(pk=incident.source_incident_id)
-        except AlertHistory.DoesNotExist:
-            _logger.error(
-                "Argus incident %r refers to non-existent NAV Alert: %s",
-                incident,
-                incident.source_incident_id,
+    # Incidents whose NAV Alert has no end time are all resolved as of this sync
+    now = datetime.now()
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as executor:
+        resolves = []
+        for incident in unresolved_argus_incidents:
+            try:
+                alert = prefetch_incident_details(AlertHistory.objects).get(
+                    pk=incident.source_incident_id
+                )
+            except AlertHistory.DoesNotExist:
+                _logger.error(
+                    "Argus incident %r refers to non-existent NAV Alert: %s",
+                    incident,
+                    incident.source_incident_id,
+                )
+                continue
+            _logger.debug(
+                "Resolving Argus Incident: %s", describe_incident(incident, sep=" ")
             )
-            continue
-        _logger.debug(
-            "Resolving Argus Incident: %s",
-            describe_incident(incident).replace("\t", " "),
-        )
-        has_resolved_time = alert.end_time < INFINITY if alert.end_time else False
-        resolve_time = alert.end_time if has_resolved_time else datetime.now()
-        client.resolve_incident(
-            incident,
-            description=get_short_end_description(alert),
-            timestamp=resolve_time,
+            has_resolved_time = alert.end_time < INFINITY if alert.end_time else False
+            resolve_time = alert.end_time if has_resolved_time else now
+            resolves.append(
+                executor.submit(
+                    client.resolve_incident,
+                    incident,
+                    description=get_short_end_description(alert),
+                    timestamp=resolve_time,
+                )
+            )
+        for resolve in resolves:
+            resolve.result()
+
+
+def post_missing_incident_to_argus(
+    alerthistid: int, incident: Incident, description: str
+) -> Optional[int]:
+    """Posts an incident payload to Argus, unless Argus already has an Incident for
+    the NAV Alert, resolved or not.
+
+    :param alerthistid: The ID of the NAV AlertHistory object the incident mirrors.
+    :param incident: The incident payload to post.
+    :param description: A description of the NAV Alert, for logging.
+    :returns: The ID of the posted Argus Incident, if one was posted.
+    """
+    existing = verify_incident_exists(alerthistid)
+    if existing:
+        _logger.warning(
+            "Argus incident %s already exists for this NAV alert, with end_time "
+            "set to %r, ignoring: %s",
+            existing.pk,
+            existing.end_time,
+            description,
         )
+        return None
+    _logger.debug("Posting to Argus: %s", description)
+    return post_incident_to_argus(incident)
 
 
 def verify_incident_exists(alerthistid: int) -> [Incident, None]:
@@ -424,12 +698,22 @@ def verify_incident_exists(alerthistid: int) -> [Incident, None]:
     regardless of whether its resolved or not.  If an Incident is found, and Incident
     object is returned for inspection.
     """
+    return find_argus_incident(alerthistid)
+
+
+def find_argus_incident(alerthistid: int, **filters) -> Optional[Incident]:
+    """Returns the first Argus Incident from this source system that mirrors a given
+    NAV Alert, or None if there is none.
+
+    Only a single incident is requested from the API, instead of a full result page.
+
+    :param filters: Additional filters for the Argus incident query.
+    """
     client = get_argus_client()
-    try:
-        incident = next(client.get_my_incidents(source_incident_id=alerthistid))
-        return incident
-    except StopIteration:
-        return None
+    incidents = client.get_my_incidents(
+        source_incident_id=alerthistid, page_size=1, **filters
+    )
+    return next(incidents, None)
 
 
 def sync_report():
@@ -461,26 +745,33 @@ def get_unsynced_report() -> Tuple[List[Incident], List[AlertHistory]]:
               Incident in Argus at all.
     """
     client = get_argus_client()
-    nav_alerts = AlertHistory.objects.unresolved().prefetch_related("messages")
+    nav_alerts = AlertHistory.objects.unresolved()
+    event_types = _config.get_event_types()
+    if event_types:
+        nav_alerts = nav_alerts.filter(event_type__in=event_types)
     if _config.get_ignore_maintenance():
-        nav_alerts = (a for a in nav_alerts if not was_on_maintenance(a))
-    nav_alerts = {a.pk: a for a in nav_alerts}
+        nav_alerts = exclude_on_maintenance(nav_alerts)
+    nav_alerts = set(
+        nav_alerts.values_list("pk", flat=True).iterator(chunk_size=SYNC_CHUNK_SIZE)
+    )
     argus_incidents = {
         int(i.source_incident_id): i for i in client.get_my_incidents(open=True)
     }
 
-    missed_resolve = set(argus_incidents).difference(nav_alerts)
-    missed_open = set(nav_alerts).difference(argus_incidents)
+    missed_resolve = argus_incidents.keys() - nav_alerts
+    missed_open = nav_alerts - argus_incidents.keys()
 
+    # only the alerts that are actually missing from Argus need to be fetched in full
+    missed_open_alerts = AlertHistory.objects.filter(pk__in=missed_open)
     return (
         [argus_incidents[i] for i in missed_resolve],
-        [nav_alerts[i] for i in missed_open],
+        list(prefetch_incident_details(missed_open_alerts)),
     )
 
 
-def was_on_maintenance(alert: AlertHistory):
-    """Returns True if the subject of the alert appeared to be on maintenance at the
-    time the alert was issued.
+def exclude_on_maintenance(alerts: QuerySet) -> QuerySet:
+    """Excludes the alerts whose subjects appeared to be on maintenance at the time
+    the alerts were issued.
 
     The NAV libraries contain API calls to evaluate whether an alert subject is
     currently on maintenance. However, it doesn't currently have the ability to
@@ -488,47 +779,44 @@ def was_on_maintenance(alert: AlertHistory):
     time. This becomes important to nav-argus-glue when syncing potentially old
     alerts from the NAV alert history to Argus (NAV 5.1 at the time of this writing)
     - hence, this function exists.
+
+    The maintenance check is done by the database, as part of the alert query.
+
+    :param alerts: An AlertHistory queryset.
     """
-    on_maintenance = False
-    maintenances = AlertHistory.objects.filter(
+    periods = AlertHistory.objects.filter(
         event_type="maintenanceState",
-        netbox=alert.netbox,
-        start_time__lte=alert.start_time,
-        end_time__gte=alert.start_time,
+        netbox=OuterRef("netbox"),
+        start_time__lte=OuterRef("start_time"),
+        end_time__gte=OuterRef("start_time"),
+    )
+    # if a service wasn't explicitly on maintenance, the netbox itself may have been
+    return alerts.annotate(
+        netbox_on_maintenance=Exists(periods.filter(subid="")),
+        service_on_maintenance=Exists(periods.filter(subid=OuterRef("subid"))),
+    ).exclude(
+        Q(netbox_on_maintenance=True)
+        | Q(service_on_maintenance=True, event_type__in=SERVICE_EVENT_TYPES)
     )
-    subject = alert.get_subject()
-    if isinstance(subject, Service):
-        on_maintenance = maintenances.filter(subid=str(subject.id)).count() > 0
-    if not on_maintenance:
-        # if service wasn't explicitly on service, check whether the netbox itself was
-        on_maintenance = maintenances.filter(subid="").count() > 0
-
-    if on_maintenance:
-        _logger.debug(
-            "%s was on maintenance when the alert took place: %s",
-            subject,
-            describe_alerthist(alert),
-        )
-        return True
-    else:
-        return False
 
 
-def describe_alerthist(alerthist: AlertHistory):
-    """Describes an alerthist object for tabulated output to stdout"""
-    return "{pk}\t{timestamp}\t{msg}".format(
-        pk=alerthist.pk,
-        timestamp=alerthist.start_time,
-        msg=get_short_start_description(alerthist) or "N/A",
-    )
+def describe_alerthist(alerthist: AlertHistory, sep: str = "\t"):
+    """Describes an alerthist object for tabulated output to stdout
+
+    :param sep: The field separator to use. Use a space for log messages.
+    """
+    msg = get_short_start_description(alerthist) or "N/A"
+    return f"{alerthist.pk}{sep}{alerthist.start_time}{sep}{msg}"
+
 
+def describe_incident(incident: Incident, sep: str = "\t"):
+    """Describes an Argus Incident object for tabulated output to stdout
 
-def describe_incident(incident: Incident):
-    """Describes an Argus Incident object for tabulated output to stdout"""
-    return "{pk}\t{timestamp}\t{msg}".format(
-        pk=incident.source_incident_id,
-        timestamp=incident.start_time,
-        msg=incident.description,
+    :param sep: The field separator to use. Use a space for log messages.
+    """
+    return (
+        f"{incident.source_incident_id}{sep}{incident.start_time}{sep}"
+        f"{incident.description}"
     )
 
 
@@ -546,37 +834,67 @@ class Configuration(dict):
                 self.update(cfg)
         except OSError:
             _logger.info("No configuration file found: %s", self.CONFIG_FILE)
+        self.parse_options()
+
+    def parse_options(self):
+        """Parses the loaded configuration options into attributes.
+
+        Some getters are called for every alert, so the options are parsed and
+        converted only once, rather than on every call.
+        """
+        api = self.get("api", {})
+        tags = self.get("tags", {})
+        filters = self.get("filters", {})
+        self._api_url = api.get("url")
+        self._api_token = api.get("token")
+        self._api_timeout = float(api.get("timeout", 2.0))
+        self._sync_on_startup = bool(api.get("sync-on-startup"))
+        self._default_level = int(api.get("default-level", 3))
+        self._always_add_tags = tags.get("always-add", {})
+        self._ignore_maintenance = filters.get("ignore-maintenance", True)
+        event_types = filters.get("event-types") or ()
+        if isinstance(event_types, str):
+            # a single event type, as opposed to a list of them
+            event_types = (event_types,)
+        self._event_types = frozenset(event_types)
+        self._ignore_stateless = filters.get("ignore-stateless", False)
 
     def get_api_url(self):
         """Returns the configured Argus API base URL"""
-        return self.get("api", {}).get("url")
+        return self._api_url
 
     def get_api_token(self):
         """Returns the configured Argus API access token"""
-        return self.get("api", {}).get("token")
+        return self._api_token
 
     def get_api_timeout(self) -> float:
         """Returns the configured API request timeout value"""
-        return float(self.get("api", {}).get("timeout", 2.0))
+        return self._api_timeout
 
     def get_sync_on_startup(self):
         """Returns True if this program should always sync the Argus API on startup"""
-        return bool(self.get("api", {}).get("sync-on-startup"))
+        return self._sync_on_startup
 
     def get_default_level(self) -> int:
-        return int(self.get("api", {}).get("default-level", 3))
+        return self._default_level
 
     def get_always_add_tags(self):
         """Returns a set of tags to add to all incidents"""
-        return self.get("tags", {}).get("always-add", {})
+        return self._always_add_tags
 
     def get_ignore_maintenance(self):
         """Returns the value of the maintenance filter option"""
-        return self.get("filters", {}).get("ignore-maintenance", True)
+        return self._ignore_maintenance
+
+    def get_event_types(self) -> FrozenSet[str]:
+        """Returns the names of the event types to post incidents for. An empty set
+        means that incidents should be posted for all event types.
+        """
+        return self._event_types
 
     def get_ignore_stateless(self):
         """Returns the value of the stateless alert filter option"""
-        return self.get("filters", {}).get("ignore-stateless", False)
+        return self._ignore_stateless
 
 
 if __name__ == "__main__":